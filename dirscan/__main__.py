@@ -13,15 +13,17 @@ extent permitted by law.
 '''
 from __future__ import absolute_import, division, print_function
 
+import os
 import sys
 
+from . import __version__
 from . import fileinfo
 from .log import set_debug
 from .scanfile import ScanfileRecord, readscanfile, fileheader, checkscanfile
 from .scanfile import file_quoter, text_quoter
 from .compare import dir_compare1, dir_compare2
 from .dirscan import walkdirs, DirscanException, DirObj
-from .usage import dirscan_argumentparser, DIRSCAN_FORMAT_HELP
+from .usage import dirscan_argumentparser
 from .progress import PrintProgress
 
 
@@ -50,25 +52,24 @@ def dirscan_main(argv=None):
         argv = sys.argv[1:]
 
 
+    # -- Printing the version only does not need the argument parser
+    if argv == ['--version']:
+        print('%s %s' %(os.path.basename(sys.argv[0]), __version__))
+        return 0
+
+
     # -- Set command line arguments and get the parser
     argp = dirscan_argumentparser()
 
 
     # -- Parsing
-    opts = argp.parse_args()
+    opts = argp.parse_args(argv)
     prog = argp.prog
     left = opts.dir1
     right = opts.dir2
     set_debug(opts.debug)
 
 
-    # -- Requested more help?
-    if opts.formathelp:
-        argp.print_help()
-        print(DIRSCAN_FORMAT_HELP)
-        argp.exit(1)
-
-
     # -- Not having onesided traversion in scan mode does not print anything
     if right is None:
         opts.traverse_oneside = True
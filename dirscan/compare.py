@@ -14,6 +14,16 @@ extent permitted by law.
 from __future__ import absolute_import, division, print_function
 
 
+# The changes from compare() that can be ignored and their ignore flag
+_IGNORE_CHANGES = {
+    'newer': 't',
+    'older': 't',
+    'UID differs': 'u',
+    'GID differs': 'g',
+    'permissions differs': 'p',
+}
+
+
 
 #pylint: disable=unused-argument
 def dir_compare1(objs, ignores='', comparetypes='', compare_dates=False):
@@ -49,40 +59,46 @@ def dir_compare2(objs, ignores='', comparetypes='', compare_dates=False):
     #         right_newer
     #    aa   Equal
 
-    if all(o.excluded for o in objs):
+    (left, right) = objs
+    left_excluded = left.excluded
+    right_excluded = right.excluded
+    left_missing = left.objtype == '-'
+    right_missing = right.objtype == '-'
+
+    if left_excluded and right_excluded:
         # File EXCLUDED
         # =============
-        if objs[0].objtype == '-':
+        if left_missing:
             return ('excluded', 'Right excluded, not present in left')
-        if objs[1].objtype == '-':
+        if right_missing:
             return ('excluded', 'Left excluded, not present in right')
         return ('excluded', 'excluded')
 
-    if objs[0].objtype == '-' or objs[0].excluded:
+    if left_missing or left_excluded:
         # File present RIGHT only
         # =======================
-        text = "%s only in right" %(objs[1].objname,)
-        if objs[1].excluded:
+        if right_excluded:
             return ('excluded', 'excluded, only in right')
-        if objs[0].excluded:
+        text = "%s only in right" %(right.objname,)
+        if left_excluded:
             text += ", left is excluded"
         return ('right_only', text)
 
-    if objs[1].objtype == '-' or objs[1].excluded:
+    if right_missing or right_excluded:
         # File present LEFT only
         # ======================
-        text = "%s only in left" %(objs[0].objname,)
-        if objs[0].excluded:
+        if left_excluded:
             return ('excluded', 'excluded, only in left')
-        if objs[1].excluded:
+        text = "%s only in left" %(left.objname,)
+        if right_excluded:
             text += ", right is excluded"
         return ('left_only', text)
 
-    if len(set(o.objtype for o in objs)) > 1:
+    if left.objtype != right.objtype:
         # File type DIFFERENT
         # ===================
         text = "Different type, %s in left and %s in right" %(
-            objs[0].objname, objs[1].objname)
+            left.objname, right.objname)
         return ('different_type', text)
 
     # File type EQUAL
@@ -96,32 +112,25 @@ def dir_compare2(objs, ignores='', comparetypes='', compare_dates=False):
 
     # compare returns a list of differences. If None, they are equal
     # This might fail, so be prepared to catch any errors
-    changes = objs[0].compare(objs[1])
+    changes = left.compare(right)
     if changes:
         # Make a new list and filter out the ignored differences
         filtered_changes = []
         change_type = 'changed'
         for change in changes:
-            if 'newer' in change:
+            ignore = _IGNORE_CHANGES.get(change)
+            if ignore and ignore in ignores:
+                continue
+            if change == 'newer':
                 if len(changes) == 1 and not compare_dates:
                     continue
-                if 't' in ignores:
-                    continue
                 change = 'left is newer'
                 change_type = 'left_newer'
-            elif 'older' in change:
+            elif change == 'older':
                 if len(changes) == 1 and not compare_dates:
                     continue
-                if 't' in ignores:
-                    continue
                 change = 'right is newer'
                 change_type = 'right_newer'
-            elif 'u' in ignores and 'UID differs' in change:
-                continue
-            elif 'g' in ignores and 'GID differs' in change:
-                continue
-            elif 'p' in ignores and 'permissions differs' in change:
-                continue
             filtered_changes.append(change)
 
         if filtered_changes:  # else from this test indicates file changed,
@@ -130,7 +139,7 @@ def dir_compare2(objs, ignores='', comparetypes='', compare_dates=False):
 
             # File contents CHANGED
             # =====================
-            text = "%s changed: %s" %(objs[0].objname, ", ".join(filtered_changes))
+            text = "%s changed: %s" %(left.objname, ", ".join(filtered_changes))
             return (change_type, text)
 
         # Compares with changes may fall through here because of
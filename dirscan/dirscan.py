@@ -32,6 +32,13 @@ HASHALGORITHM = hashlib.sha256
 # Number of bytes to read per round in the hash reader
 HASHCHUNKSIZE = 16*4096
 
+# hashlib.file_digest() runs the read and hash loop in C. It is available
+# from Python 3.11.
+_FILE_DIGEST = getattr(hashlib, 'file_digest', None)
+
+# os.scandir() is available from Python 3.5
+_SCANDIR = getattr(os, 'scandir', None)
+
 
 class DirscanException(Exception):
     ''' Directory scan error '''
@@ -48,6 +55,11 @@ class DirscanException(Exception):
 class BaseObj(object):
     ''' File Objects Base Class '''
 
+    # Large trees hold a great number of file objects, so they are slotted
+    # to keep the memory footprint down
+    __slots__ = ('path', 'name', 'stat', 'treeid', 'parsed', 'excluded', 'selected',
+                 '_fullpath')
+
     def __init__(self, name, path='', stat=None, treeid=None):
 
         # Ensure the name does not end with a slash, that messes up path
@@ -59,6 +71,7 @@ class BaseObj(object):
         self.name = name
         self.stat = stat
         self.treeid = treeid
+        self._fullpath = None
 
         self.parsed = False
         self.excluded = False
@@ -68,7 +81,12 @@ class BaseObj(object):
     @property
     def fullpath(self):
         ''' Return the complete path of the object '''
-        return os.path.join(self.path, self.name)
+        # The path is used for every file operation and when printing, so
+        # only join it once
+        fullpath = self._fullpath
+        if fullpath is None:
+            fullpath = self._fullpath = os.path.join(self.path, self.name)
+        return fullpath
 
     @property
     def mode(self):
@@ -125,6 +143,8 @@ class BaseObj(object):
         ''' Return a list of differences '''
         if changes is None:
             changes = []
+        if other is self:
+            return changes
         if type(other) is not type(self):
             return ['type mismatch']
         if self.uid != other.uid:
@@ -133,9 +153,13 @@ class BaseObj(object):
             changes.append('GID differs')
         if self.mode != other.mode:
             changes.append('permissions differs')
-        if self.mtime > other.mtime:
+        # The mtime property makes a new datetime on each access, so get
+        # them only once
+        mtime = self.mtime
+        other_mtime = other.mtime
+        if mtime > other_mtime:
             changes.append('newer')
-        elif self.mtime < other.mtime:
+        elif mtime < other_mtime:
             changes.append('older')
         return changes
 
@@ -176,7 +200,12 @@ class FileObj(BaseObj):
     objtype = 'f'
     objname = 'file'
 
-    hashsum_cache = None
+    __slots__ = ('hashsum_cache',)
+
+
+    def __init__(self, name, path='', stat=None, treeid=None):
+        BaseObj.__init__(self, name, path, stat, treeid)
+        self.hashsum_cache = None
 
 
     def hashsum(self):
@@ -188,13 +217,18 @@ class FileObj(BaseObj):
         if self.hashsum_cache:
             return self.hashsum_cache
 
-        shahash = HASHALGORITHM()
-        with open(self.fullpath, 'rb') as shafile:
-            while True:
-                data = shafile.read(HASHCHUNKSIZE)
-                if not data:
-                    break
-                shahash.update(data)
+        # The file is read in large chunks, so skip the read buffer which
+        # would only add another copy of the data
+        with open(self.fullpath, 'rb', 0) as shafile:
+            if _FILE_DIGEST:
+                shahash = _FILE_DIGEST(shafile, HASHALGORITHM)
+            else:
+                shahash = HASHALGORITHM()
+                while True:
+                    data = shafile.read(HASHCHUNKSIZE)
+                    if not data:
+                        break
+                    shahash.update(data)
             self.hashsum_cache = shahash.digest()
         return self.hashsum_cache
 
@@ -208,6 +242,9 @@ class FileObj(BaseObj):
         ''' Compare two file objects '''
         if changes is None:
             changes = []
+        if other is self:
+            # No need to read the file contents to compare it with itself
+            return changes
         if self.size != other.size:
             changes.append('size differs')
         elif self.hashsum_cache or other.hashsum_cache:
@@ -227,7 +264,12 @@ class LinkObj(BaseObj):
     objtype = 'l'
     objname = 'symbolic link'
 
-    link = None
+    __slots__ = ('link',)
+
+
+    def __init__(self, name, path='', stat=None, treeid=None):
+        BaseObj.__init__(self, name, path, stat, treeid)
+        self.link = None
 
 
     def parse(self, done=True):
@@ -256,6 +298,8 @@ class DirObj(BaseObj):
     objtype = 'd'
     objname = 'directory'
 
+    __slots__ = ('dir', 'dir_parsed')
+
     size = None
 
 
@@ -283,8 +327,18 @@ class DirObj(BaseObj):
             self.dir_parsed = True
 
             # Try to get list of sub directories and make new sub object
-            for name in os.listdir(self.fullpath):
-                self.dir[name] = create_from_fs(name, self.fullpath, treeid=self.treeid)
+            fullpath = self.fullpath
+            if _SCANDIR:
+                # The directory entries cache their stat info, which saves a
+                # system call on platforms where the directory listing
+                # provides it. The list ensures the scandir iterator is closed.
+                for entry in list(_SCANDIR(fullpath)):
+                    self.dir[entry.name] = create_from_fs(
+                        entry.name, fullpath, treeid=self.treeid,
+                        stat=entry.stat(follow_symlinks=False))
+            else:
+                for name in os.listdir(fullpath):
+                    self.dir[name] = create_from_fs(name, fullpath, treeid=self.treeid)
 
         return tuple(self.dir.keys())
 
@@ -302,8 +356,9 @@ class DirObj(BaseObj):
 
 class SpecialObj(BaseObj):
     ''' Device (block or char) device '''
-    objtype = 's'
-    objname = 'special file'
+
+    # The type and name are set per object from the kind of special file
+    __slots__ = ('objtype', 'objname')
 
     size = None
 
@@ -321,6 +376,8 @@ class SpecialObj(BaseObj):
             self.objname = 'fifo'
         elif dtype == 's':
             self.objname = 'socket'
+        else:
+            self.objname = 'special file'
 
 
     def compare(self, other, changes=None):
@@ -340,6 +397,8 @@ class NonExistingObj(BaseObj):
     objtype = '-'
     objname = 'missing file'
 
+    __slots__ = ()
+
     def parse(self, done=True):
         self.stat = os.stat_result((None, None, None, None, None, None, None, None, None, None))
         self.parsed = True
@@ -353,12 +412,13 @@ class NonExistingObj(BaseObj):
 #
 ############################################################
 
-def create_from_fs(name, path='', treeid=None):
+def create_from_fs(name, path='', treeid=None, stat=None):
     ''' Create a new object from file system path and return an
         instance of the object. The object type returned is based on
-        stat of the actual file system entry.'''
-    fullpath = os.path.join(path, name)
-    stat = os.lstat(fullpath)
+        stat of the actual file system entry. If stat is given, it is used
+        instead of doing a lstat() of the file.'''
+    if stat is None:
+        stat = os.lstat(os.path.join(path, name))
     mode = stat.st_mode
     if fstat.S_ISREG(mode):
         return FileObj(name, path, stat, treeid=treeid)
@@ -375,40 +435,69 @@ def create_from_fs(name, path='', treeid=None):
     elif fstat.S_ISSOCK(mode):
         return SpecialObj(name, path, stat, 's', treeid=treeid)
     else:
-        raise DirscanException("%s: Uknown file type" %(fullpath))
+        raise DirscanException("%s: Uknown file type" %(os.path.join(path, name)))
 
 
 
-def create_from_data(name, path, objtype, size, mode, uid, gid, mtime, data=None, treeid=None):
-    ''' Create a new object from the given data and return an
-        instance of the object. '''
+#pylint: disable=unused-argument
+def _file_from_data(name, path, stat, objtype, data, treeid):
+    ''' Create a FileObj from scan data '''
+    fileobj = FileObj(name, path, stat=stat, treeid=treeid)
+    fileobj.hashsum_cache = binascii.unhexlify(data) if data else None
 
-    # Make a fake stat element from the given meta-data
-    # st_mode, st_ino, st_dev, st_nlink, st_uid, st_gid, st_size, st_atime, st_mtime, st_ctime
-    fakestat = os.stat_result((mode, None, None, None, uid, gid, size, None, mtime, None))
+    # Hashsum is normally not defined if the size is 0.
+    if not data and stat.st_size == 0:
+        fileobj.hashsum_cache = HASHALGORITHM().digest()
+    return fileobj
 
-    if objtype == 'f':
-        fileobj = FileObj(name, path, stat=fakestat, treeid=treeid)
-        fileobj.hashsum_cache = binascii.unhexlify(data) if data else None
 
-        # Hashsum is normally not defined if the size is 0.
-        if not data and size == 0:
-            fileobj.hashsum_cache = HASHALGORITHM().digest()
+def _link_from_data(name, path, stat, objtype, data, treeid):
+    ''' Create a LinkObj from scan data '''
+    fileobj = LinkObj(name, path, stat=stat, treeid=treeid)
+    fileobj.link = data
+    return fileobj
 
-    elif objtype == 'l':
-        fileobj = LinkObj(name, path, stat=fakestat, treeid=treeid)
-        fileobj.link = data
 
-    elif objtype == 'd':
-        fileobj = DirObj(name, path, stat=fakestat, treeid=treeid)
-        fileobj.dir_parsed = True
+def _dir_from_data(name, path, stat, objtype, data, treeid):
+    ''' Create a DirObj from scan data '''
+    fileobj = DirObj(name, path, stat=stat, treeid=treeid)
+    fileobj.dir_parsed = True
+    return fileobj
 
-    elif objtype == 'b' or objtype == 'c' or objtype == 'p' or objtype == 's':
-        fileobj = SpecialObj(name, path, stat=fakestat, dtype=objtype, treeid=treeid)
 
-    else:
+def _special_from_data(name, path, stat, objtype, data, treeid):
+    ''' Create a SpecialObj from scan data '''
+    return SpecialObj(name, path, stat=stat, dtype=objtype, treeid=treeid)
+#pylint: enable=unused-argument
+
+
+# Object factories for create_from_data(), indexed by object type
+_DATA_FACTORIES = {
+    'f': _file_from_data,
+    'l': _link_from_data,
+    'd': _dir_from_data,
+    'b': _special_from_data,
+    'c': _special_from_data,
+    'p': _special_from_data,
+    's': _special_from_data,
+}
+
+
+
+def create_from_data(name, path, objtype, size, mode, uid, gid, mtime, data=None, treeid=None):
+    ''' Create a new object from the given data and return an
+        instance of the object. '''
+
+    factory = _DATA_FACTORIES.get(objtype)
+    if factory is None:
         raise DirscanException("Unknown object type '%s'" %(objtype))
 
+    # Make a fake stat element from the given meta-data
+    # st_mode, st_ino, st_dev, st_nlink, st_uid, st_gid, st_size, st_atime, st_mtime, st_ctime
+    fakestat = os.stat_result((mode, None, None, None, uid, gid, size, None, mtime, None))
+
+    fileobj = factory(name, path, fakestat, objtype, data, treeid)
+
     # Ensure we don't go out on the FS
     fileobj.parsed = True
     return fileobj
@@ -503,25 +592,16 @@ def walkdirs(dirs, reverse=False, excludes=None, onefs=False,
         except OSError as err:
             raise DirscanException(str(err))
 
-    # Handle the special cases with '/' -> './'
-    basename = base[0].fullpath
-    baserepl = '.'
-    if basename == '/':
-        baserepl = './'
-
-    # Start the queue
-    queue = [tuple(base)]
+    # Start the queue. The queue carries the relative path along with the
+    # objects, so it doesn't have to be derived from the object fullpath.
+    queue = [('.', tuple(base))]
 
     # Traverse the queue
     while queue:
 
-        # Get the next set of objects
-        objs = queue.pop(-1)
-
-        # Relative path: Gives '.', './a', './b'
-        path = objs[0].fullpath.replace(basename, baserepl, 1)
-        if path == './':
-            path = '.'
+        # Get the next set of objects and their relative path. The path gives
+        # '.', './a', './b'
+        (path, objs) = queue.pop(-1)
 
         # Parse the objects, getting object metadata
         for obj, baseobj in zip(objs, base):
@@ -540,33 +620,36 @@ def walkdirs(dirs, reverse=False, excludes=None, onefs=False,
                 if not exception_fn or not exception_fn(err):
                     raise
 
-        # How many objects are present?
-        present = sum(not isinstance(obj, NonExistingObj) and not obj.excluded \
-            for obj in objs)
+        # How many objects are present? NonExistingObj() is recognized by its
+        # '-' objtype, as in the comparators.
+        present = sum(obj.objtype != '-' and not obj.excluded for obj in objs)
 
         # Send back object list to caller
         debug('scan %s:  %s' %(path, objs))
         yield (path, objs)
 
+        # Skip all the children if the parent is the only one, unless
+        # traversing one-sided directories
+        if not traverse_oneside and present == 1:
+            parents = ()
+        else:
+            parents = objs
+
         # Create a list of unique children names seen across all objects, where
         # excluded objects are removed from parsing
         subobjs = []
-        for obj in objs:
+        for obj in parents:
             try:
-                # Skip the children if...
-
-                # ...the parent is excluded
+                # Skip the children if the parent is excluded
                 if obj.excluded:
                     continue
 
-                # ..the parent is the only one
-                if not traverse_oneside and present == 1:
-                    continue
-
-                # Get and append the children names
+                # Get and append the children names. Objects without any
+                # children add nothing to the merge, so they are left out.
                 children = obj.children()
                 debug("  Children of %s is %s" %(obj, children))
-                subobjs.append(children)
+                if children:
+                    subobjs.append(children)
 
             # Getting the children failed
             except OSError as err:
@@ -574,19 +657,32 @@ def walkdirs(dirs, reverse=False, excludes=None, onefs=False,
                 if not exception_fn or not exception_fn(err):
                     raise
 
-        # Merge all subobjects into a single list of unique, sorted, children names
-        children = []
-        for name in sorted(set(itertools.chain.from_iterable(subobjs)), reverse=not reverse):
+        # Merge all subobjects into a single list of unique, sorted, children
+        # names. The names from a single directory are already unique.
+        if len(subobjs) == 1:
+            names = sorted(subobjs[0], reverse=not reverse)
+        else:
+            names = sorted(set(itertools.chain.from_iterable(subobjs)), reverse=not reverse)
+
+        # The parent paths are used by the NonExistingObj() placeholders. Get
+        # them once for all the children, but not for objects without children
+        parentpaths = [(obj, obj.fullpath) for obj in objs] if names else ()
 
-            # Create a list of children objects for that name
-            child = tuple(obj.get(name,
-                                  NonExistingObj(name,
-                                                 obj.fullpath,
-                                                 treeid=obj.treeid)) \
-                for obj in objs)
+        children = []
+        for name in names:
+
+            # Create a list of children objects for that name. The
+            # NonExistingObj() placeholder is only made for the objects that
+            # don't have the child.
+            child = []
+            for (obj, parentpath) in parentpaths:
+                subobj = obj.get(name)
+                if subobj is None:
+                    subobj = NonExistingObj(name, parentpath, treeid=obj.treeid)
+                child.append(subobj)
 
             # Append it to the processing list
-            children.append(child)
+            children.append((path + '/' + name, tuple(child)))
 
         # Close objects to conserve memory
         if close_during:
@@ -16,6 +16,7 @@ from __future__ import absolute_import, division, print_function
 import os
 import sys
 import stat
+import itertools
 
 from . import dirscan
 from .dirscan import DirscanException
@@ -28,6 +29,12 @@ class ScanFIleException(DirscanException):
 # Known scan file versions
 SCANFILE_VERSIONS = ('v1',)
 
+# Number of bytes to read when probing for a scan file header
+SCANFILE_HEADERSIZE = 32
+
+# Read buffer size used when reading scan files
+SCANFILE_BUFSIZE = 1 << 20
+
 
 
 def checkscanfile(filename):
@@ -46,14 +53,20 @@ def checkscanfile(filename):
         return False
 
     try:
-        kwargs = {}
-        if sys.version_info[0] >= 3:
-            kwargs['errors'] = 'surrogateescape'
-        with open(filename, 'r', **kwargs) as infile:
-            checkheader(infile.readline(), filename)
+        # Only the first few bytes are needed for the header check, so
+        # read them raw and avoid setting up a file object.
+        fd = os.open(filename, os.O_RDONLY)
+        try:
+            header = os.read(fd, SCANFILE_HEADERSIZE)
+        finally:
+            os.close(fd)
     except OSError as err:
         raise DirscanException(str(err))
 
+    if sys.version_info[0] >= 3:
+        header = header.decode('utf-8', 'surrogateescape')
+    checkheader(header.split('\n')[0], filename)
+
     return True
 
 
@@ -87,20 +100,21 @@ class ScanfileRecord(object):
     FORMAT = "{type},{size},{mode},{uid},{gid},{mtime_n},{data},{path}"
 
     def __init__(self, parse):
-        args = [unquote(e) for e in parse.rstrip().split(',')]
+        args = parse.rstrip().split(',')
         length = len(args)
         if length != 8:
             raise DirscanException("missing file fields (got %s of 8)" %(length,))
         try:
-            # Must be kept in sync with self.FORMAT
+            # Must be kept in sync with self.FORMAT. Only the data and path
+            # fields can contain quoted text.
             self.type = args[0]
             self.size = int(args[1] or '0')
             self.mode = int(args[2])
             self.uid = int(args[3])
             self.gid = int(args[4])
             self.mtime = float(args[5])
-            self.data = args[6] or None
-            self.path = args[7]
+            self.data = unquote(args[6]) or None
+            self.path = unquote(args[7])
         except ValueError as err:
             raise DirscanException(str(err))
         if not self.type:
@@ -127,7 +141,7 @@ def readscanfile(filename, treeid=None, root=None):
     if sys.version_info[0] >= 3:
         kwargs['errors'] = 'surrogateescape'
 
-    with open(filename, 'r', **kwargs) as infile:
+    with open(filename, 'r', SCANFILE_BUFSIZE, **kwargs) as infile:
 
         # Check the scanfile header
         checkheader(infile.readline(), filename)
@@ -140,18 +154,29 @@ def readscanfile(filename, treeid=None, root=None):
                 # Read/parse the record
                 data = ScanfileRecord(line)
 
-                # Split path into path and name
+                # Split path into path and name. Scan files always use '/'
+                # as separator, so rpartition() is sufficient.
                 opath = data.path
-                (path, name) = os.path.split(opath)
+                (path, _sep, name) = opath.rpartition('/')
 
                 # Set file object path and name
                 if path == '':
                     if name != '.':
                         raise DirscanException("unexpected top-level entity '%s'" %(name,))
+                    if opath in dirtree:
+                        raise DirscanException("'%s' already exists in file" %(opath,))
+                    parent = None
                     fpath = path
                     fname = base_fname
                 else:
-                    fpath = os.path.join(base_fname, path[2:])
+                    # Children use the path string prepared for their parent
+                    # dir, so all entries in a directory share one string
+                    try:
+                        (parent, fpath) = dirtree[path]
+                    except KeyError:
+                        raise DirscanException("'%s' is an orphan" %(opath))
+                    if parent.get(name) is not None:
+                        raise DirscanException("'%s' already exists in file" %(opath,))
                     fname = name
 
                 # Create new file object
@@ -165,20 +190,14 @@ def readscanfile(filename, treeid=None, root=None):
                                                    data=data.data,
                                                    treeid=treeid)
 
-                # The first object is special
-                if opath == '.':
-                    dirtree[opath] = fileobj
-                else:
-                    if path not in dirtree:
-                        raise DirscanException("'%s' is an orphan" %(opath))
-
-                    # Add the object into the parent's children
-                    dirtree[path].add_child(fileobj)
+                # Add the object into the parent's children
+                if parent is not None:
+                    parent.add_child(fileobj)
 
                 # Make sure we make an entry into the dirtree to ensure
-                # we have a list of the parents
-                if data.type == 'd':
-                    dirtree[opath] = fileobj
+                # we have a list of the parents. The first object is special.
+                if opath == '.' or data.type == 'd':
+                    dirtree[opath] = (fileobj, os.path.join(base_fname, opath[2:]))
 
             except DirscanException as err:
                 raise DirscanException("%s:%s: Data error, " %(
@@ -191,7 +210,7 @@ def readscanfile(filename, treeid=None, root=None):
         raise DirscanException("No such directory '%s' in scanfile '%s" %(root, filename))
 
     # Now the tree should be populated
-    return dirtree[droot]
+    return dirtree[droot][0]
 
 
 
@@ -204,22 +223,25 @@ def readscanfile(filename, treeid=None, root=None):
 #     <32 and 127-255 -> '\xNN'
 #
 
+# Pre-formatted '\xNN' escape sequences for the 7-bit code points
+_HEX_ESCAPES = tuple('\\x%02x' %(value) for value in range(128))
+
+# Characters escaped by text_quoter(): control chars, DEL and '\'
+_TEXT_ESCAPES = dict((chr(value), _HEX_ESCAPES[value])
+                     for value in itertools.chain(range(32), (127,)))
+_TEXT_ESCAPES['\\'] = '\\\\'
+
+
 def text_quoter(text):
     ''' Quote the text for printing '''
 
-    out = ''
-    for char in text:
-        value = ord(char)
-        if value < 32 or value == 127:
-            out += '\\x%02x' %(value)
-        #elif v == 32:  # ' '
-        #    out += '\\ '
-        #elif v == 44:  # ','
-        #    out += '\\-'
-        elif value == 92:  # '\'
-            out += '\\\\'
-        else:
-            out += char
+    escapes = _TEXT_ESCAPES
+    out = ''.join([escapes.get(char, char) for char in text])
+
+    # Only text with non-ASCII characters can contain encoding errors, so
+    # skip the encoding check for the common pure ASCII case
+    if not text or max(text) < '\x80':
+        return out
 
     if sys.version_info[0] < 3:
         try:
@@ -235,10 +257,9 @@ def text_quoter(text):
             _tmp = text.encode('utf-8')
         except UnicodeEncodeError:
             # Strings with encoding errors will come up as surrogates, which
-            # will fail the encode. This code will make the str into a bytes
-            # object and back to a string, where surrogates will be escaped
-            # as \xNN. [2:-1] removes the b' prefix and ' postfix
-            out = str(os.fsencode(out))[2:-1]
+            # will fail the encode. Turn the str back into its original bytes
+            # and decode it as ASCII, which escapes all bytes >=128 as \xNN.
+            out = out.encode('utf-8', 'surrogateescape').decode('ascii', 'backslashreplace')
 
     return out
 
@@ -258,12 +279,22 @@ def file_quoter(text):
 
 
 
+# Single character escapes understood by unquote()
+_UNQUOTE_ESCAPES = {
+    '\\': '\\',
+    '-': ',',
+    ' ': ' ',
+}
+
+
 def unquote(text):
     ''' Simple text un-quoter for the scan files '''
 
     if '\\' not in text:
         return text
-    out = ''
+    # Collect the output parts in a list and join them at the end
+    out = []
+    append = out.append
     getchars = 0
     escape = False
     hexstr = ''
@@ -279,29 +310,26 @@ def unquote(text):
                 # for the quoter to work with this values
                 if value >= 128 and sys.version_info[0] >= 3:
                     value |= 0xdc00
-                out += chr(value)
+                append(chr(value))
 
         elif escape:
             # Getting escape code following '\'
-            if '\\' in char:
-                out += '\\'
-            elif '-' in char:
-                out += ','
-            elif ' ' in char:
-                out += ' '
-            elif 'x' in char:
+            unescaped = _UNQUOTE_ESCAPES.get(char)
+            if unescaped is not None:
+                append(unescaped)
+            elif char == 'x':
                 getchars = 2
                 hexstr = ''
             else:
                 raise DirscanException("Unknown escape char '%s'" %(char,))
             escape = False
 
-        elif '\\' in char:
+        elif char == '\\':
             escape = True
 
         else:
-            out += char
+            append(char)
 
     if escape or getchars:
         raise DirscanException("Incomplete escape string '%s'" %(text))
-    return out
+    return ''.join(out)
@@ -13,8 +13,6 @@ extent permitted by law.
 '''
 from __future__ import absolute_import, division, print_function
 
-import argparse
-
 from . import __version__
 
 
@@ -116,10 +114,33 @@ summary template:
 '''
 
 
+# The parser returned by dirscan_argumentparser()
+_ARGUMENTPARSER = None
+
+
 def dirscan_argumentparser():
     ''' Return argument parser object for dirscan, and setting all command-line
-        options
+        options. The parser is only built on the first call and shared by
+        subsequent calls, so it must not be modified by the caller.
     '''
+    global _ARGUMENTPARSER
+    if _ARGUMENTPARSER is None:
+        _ARGUMENTPARSER = _build_argumentparser()
+    return _ARGUMENTPARSER
+
+
+def _build_argumentparser():
+    ''' Build the dirscan argument parser '''
+
+    # Imported here as it is only needed when parsing the command line
+    import argparse
+
+    class FormatHelpAction(argparse.Action):
+        ''' Print the help text including the format help and exit '''
+        def __call__(self, parser, namespace, values, option_string=None):
+            parser.print_help()
+            print(DIRSCAN_FORMAT_HELP)
+            parser.exit(1)
 
     argp = argparse.ArgumentParser(description=DIRSCAN_DESCRIPTION,
                                    formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -128,129 +149,75 @@ def dirscan_argumentparser():
     argp.add_argument('--version', action='version', version='%(prog)s ' + __version__)
     argp.add_argument('--help', action='help')
 
-    argp.add_argument('-a', '--all', action='store_true', dest='all', default=False,
-                      help='''
-        Print all file info
-        ''')
+    argp.add_argument('-a', '--all', action='store_true', dest='all',
+                      help='Print all file info')
     argp.add_argument('-c', '--compare', metavar='TYPES', action='store',
-                      dest='comparetypes', default='', help='''
-        Show only compare relationship TYPES:
-            e=equal,
-            l=left only,
-            r=right only,
-            c=changed,
-            L=left is newest,
-            R=right is newest,
-            t=different type,
-            E=error,
-            x=excluded
-        ''')
+                      dest='comparetypes', default='',
+                      help='Show only compare relationship TYPES: e=equal, l=left only, '
+                           'r=right only, c=changed, L=left is newest, R=right is newest, '
+                           't=different type, E=error, x=excluded')
     argp.add_argument('-d', '--compare-dates', action='store_true',
-                      dest='compare_dates', default=False, help='''
-        Compare dates on files which are otherwise equal
-        ''')
+                      dest='compare_dates',
+                      help='Compare dates on files which are otherwise equal')
     argp.add_argument('-D', '--debug', action='store_true', dest='debug',
-                      default=False, help='''
-        Enable debug output
-        ''')
+                      help='Enable debug output')
     argp.add_argument('-f', '--file-types', metavar='TYPES', action='store',
-                      dest='filetypes', default='', help='''
-        Show only file types.
-            f=files,
-            d=dirs,
-            l=links,
-            b=blkdev,
-            c=chrdev,
-            p=pipes,
-            s=sockets
-        ''')
+                      dest='filetypes', default='',
+                      help='Show only file types. f=files, d=dirs, l=links, b=blkdev, '
+                           'c=chrdev, p=pipes, s=sockets')
     argp.add_argument('-F', '--format', metavar='TEMPLATE', dest='format',
-                      default=None, help='''
-        Custom file info line template. See FORMAT  ''')
+                      help='Custom file info line template. See FORMAT')
     argp.add_argument('-h', '--human', action='store_true', dest='human',
-                      default=False, help='''
-        Display human readable sizes
-        ''')
+                      help='Display human readable sizes')
     argp.add_argument('-i', '--ignore', metavar='IGNORES', action='store',
-                      dest='ignore', default='', help='''
-        Ignore compare differences in u=uid, g=gid, p=permissions, t=time
-        ''')
+                      dest='ignore', default='',
+                      help='Ignore compare differences in u=uid, g=gid, p=permissions, t=time')
     argp.add_argument('-l', '--long', action='store_true', dest='long',
-                      default=False, help='''
-        Dump file in extended format
-        ''')
+                      help='Dump file in extended format')
     argp.add_argument('-o', '--output', metavar='FILE', action='store',
-                      dest='outfile', help='''
-        Store scan output in FILE
-        ''')
+                      dest='outfile',
+                      help='Store scan output in FILE')
     argp.add_argument('-q', '--quiet', action='store_true', dest='quiet',
-                      default=False, help='''
-        Quiet operation
-        ''')
+                      help='Quiet operation')
     argp.add_argument('-Q', '--suppress-errors', action='store_true',
-                      dest='quieterr', default=False, help='''
-        Suppress error messages
-        ''')
+                      dest='quieterr',
+                      help='Suppress error messages')
     argp.add_argument('-r', '--reverse', action='store_true', dest='reverse',
-                      default=False, help='''
-        Traverse directories in reverse order
-        ''')
+                      help='Traverse directories in reverse order')
     argp.add_argument('-s', action='store_true', dest='enable_summary',
-                      default=False, help='''
-        Print scan statistics summary.
-        ''')
+                      help='Print scan statistics summary.')
     argp.add_argument('--summary', metavar='SUMMARY_TEMPLATE',
-                      action='append', dest='summary', default=None, help='''
-        Print scan statistics summary and provide custom template.
-        ''')
+                      action='append', dest='summary',
+                      help='Print scan statistics summary and provide custom template.')
     argp.add_argument('-t', '--traverse-oneside', action='store_true',
-                      dest='traverse_oneside', default=False, help='''
-        Traverse directories that exists on only one side of comparison
-        ''')
+                      dest='traverse_oneside',
+                      help='Traverse directories that exists on only one side of comparison')
     argp.add_argument('-v', '--verbose', action='store_true', dest='verbose',
-                      default=False, help='''
-        Verbose printing
-        ''')
+                      help='Verbose printing')
     argp.add_argument('-x', '--one-file-system', action='store_true', dest='onefs',
-                      default=False, help='''
-        Don't cross filesystem boundaries
-        ''')
+                      help="Don't cross filesystem boundaries")
     argp.add_argument('-X', '--exclude', metavar='PATH', action='append',
-                      dest='exclude', default=[], help='''
-        Exclude PATH from scan. PATH is relative to DIR
-        ''')
-    argp.add_argument('--format-help', action='store_true', dest='formathelp', default=None,
-                      help='''
-        Show help for --format and --summary
-        ''')
+                      dest='exclude', default=[],
+                      help='Exclude PATH from scan. PATH is relative to DIR')
+    argp.add_argument('--format-help', action=FormatHelpAction, nargs=0,
+                      default=argparse.SUPPRESS,
+                      help='Show help for --format and --summary')
     argp.add_argument('-p', '--progress', action='store_true', dest='progress',
-                      default=False, help='''
-        Show progress while scanning
-        ''')
-    argp.add_argument('--prefix', metavar='PATH', dest='prefix', default=None,
-                      help='''
-        When reading from scanfiles on either sides, use the given prefix PATH
-        to read a subsection of the scan file(s).
-        ''')
-    argp.add_argument('--left-prefix', metavar='PATH', dest='leftprefix', default=None,
-                      help='''
-        When reading from a scanfile on the left side, use the given prefix PATH
-        to read a subsection of the scan file.
-        ''')
-    argp.add_argument('--right-prefix', metavar='PATH', dest='rightprefix', default=None,
-                      help='''
-        When reading from a scanfiles on the right side, use the given prefix PATH
-        to read a subsection of the scan file.
-        ''')
+                      help='Show progress while scanning')
+    argp.add_argument('--prefix', metavar='PATH', dest='prefix',
+                      help='When reading from scanfiles on either sides, use the given '
+                           'prefix PATH to read a subsection of the scan file(s).')
+    argp.add_argument('--left-prefix', metavar='PATH', dest='leftprefix',
+                      help='When reading from a scanfile on the left side, use the given '
+                           'prefix PATH to read a subsection of the scan file.')
+    argp.add_argument('--right-prefix', metavar='PATH', dest='rightprefix',
+                      help='When reading from a scanfiles on the right side, use the given '
+                           'prefix PATH to read a subsection of the scan file.')
 
     # Main arguments
-    argp.add_argument('dir1', metavar='LEFT_DIR', default=None, #nargs='?',
-                      help='''
-        Directory to scan/traverse, or LEFT side of comparison
-        ''')
-    argp.add_argument('dir2', metavar='RIGHT_DIR', default=None, nargs='?',
-                      help='''
-        RIGHT side of comparison if preset
-        ''')
+    argp.add_argument('dir1', metavar='LEFT_DIR', #nargs='?',
+                      help='Directory to scan/traverse, or LEFT side of comparison')
+    argp.add_argument('dir2', metavar='RIGHT_DIR', nargs='?',
+                      help='RIGHT side of comparison if preset')
 
     return argp
@@ -2,7 +2,7 @@
 echo "Loading $testfile: Scanfile tests"
 
 all=(0301 0302 0303 0304 0305 0306 0307 0308 0309 0310 0311 0312 0313 0314\
-     0315 0316 0317 0318 0319 0320 0321 0322 0323 0324)
+     0315 0316 0317 0318 0319 0320 0321 0322 0323 0324 0325)
 
 
 test_0301 () {
@@ -223,3 +223,15 @@ test_0324 () {
     dirscan -als scanfile.txt --prefix d -o scanfile2.txt
     tcmd cat scanfile2.txt
 }
+
+test_0325 () {
+    tsetup $FUNCNAME "Testing duplicate entry in scanfile"
+    cat <<EOF >scanfile.txt
+#!ds:v1
+d,,16877,1000,1000,1529323497,,.
+f,0,33188,1000,1000,1529323497,,./foo
+d,,16877,1000,1000,1529323497,,./foo
+EOF
+
+    dirscan -als scanfile.txt
+}